@@ -1,15 +1,24 @@
+import os
 import pandas as pd
 import numpy as np
-from faker import Faker
+from numba import njit, prange
 from datetime import datetime, timedelta
-import random
 
 # -----------------------------
 # CONFIGURATION
 # -----------------------------
 NUM_ROWS = 5000
-fake = Faker('en_US')
+SEED = 42
 FILE_NAME = 'Business_Performance_Data_Enhanced.csv'
+CSV_CHUNK_SIZE = 1000
+# Decimal places applied only when formatting the CSV; values keep full precision in memory and Parquet
+CSV_DECIMALS = {
+    'Revenue': 2, 'Cost': 2, 'Profit': 2, 'Profit_Margin_pct': 2, 'Average_Order_Value': 2,
+    'Return_Rate_pct': 3, 'Conversion_Rate_pct': 3
+}
+
+# Single PCG64 generator for every draw (fast bulk sampling, reproducible output)
+rng = np.random.default_rng(SEED)
 
 # Generate data for the past 18 months
 CURRENT_TIME = datetime.now()
@@ -23,119 +32,131 @@ PRODUCT_NAMES = {
     'Software': ['Cloud Subscription', 'Data Analytics Tool', 'ERP Module', 'CRM Suite'],
     'Apparel': ['T-Shirt', 'Polo Shirt', 'Jacket', 'Hoodie']
 }
+# Flat product table: a category code's products sit at PRODUCT_OFFSETS[code] + [0, PRODUCT_COUNTS[code])
+ALL_PRODUCT_NAMES = [name for category in PRODUCT_CATEGORIES for name in PRODUCT_NAMES[category]]
+PRODUCT_COUNTS = np.array([len(PRODUCT_NAMES[category]) for category in PRODUCT_CATEGORIES])
+PRODUCT_OFFSETS = np.concatenate(([0], np.cumsum(PRODUCT_COUNTS)[:-1]))
+# Base price range per category, aligned with PRODUCT_CATEGORIES
+BASE_PRICE_LOW = np.array([150.0, 100.0, 500.0, 20.0])
+BASE_PRICE_HIGH = np.array([800.0, 600.0, 2500.0, 150.0])
 CUSTOMER_SEGMENTS = ['Retail', 'Wholesale', 'Online']
 CAMPAIGN_NAMES = ['Spring Promo', 'Summer Sale', 'Holiday Sale', 'Back-to-School', 'Q1 Launch']
+PHYSICAL_CATEGORY_CODES = [PRODUCT_CATEGORIES.index('Electronics'), PRODUCT_CATEGORIES.index('Apparel')]
+
+# Revenue multipliers (Simulated Bias/Performance), indexed by the integer codes of the lists above
+REGION_CATEGORY_MULT = np.ones((len(REGIONS), len(PRODUCT_CATEGORIES)), dtype=np.float64)
+REGION_CATEGORY_MULT[REGIONS.index('North'), PRODUCT_CATEGORIES.index('Electronics')] = 1.15  # North bias for Electronics
+REGION_CATEGORY_MULT[REGIONS.index('South'), PRODUCT_CATEGORIES.index('Apparel')] = 1.2  # South bias for Apparel
+CAMPAIGN_MULT = np.array([1.0, 1.1, 1.25, 1.0, 1.0], dtype=np.float64)  # Summer Sale and Holiday Sale boosts
 
 # -----------------------------
-# DATA GENERATION FUNCTION
+# FINANCIALS KERNEL
 # -----------------------------
-def generate_business_data(num_records):
-    records = []
-    
-    for _ in range(num_records):
-        # --- General Business Attributes ---
-        # Random date within the last 18 months
-        transaction_date = START_DATE + timedelta(days=random.randint(0, 540))
-        region = np.random.choice(REGIONS, p=[0.25, 0.25, 0.25, 0.25])
-        category = np.random.choice(PRODUCT_CATEGORIES, p=[0.3, 0.2, 0.3, 0.2])
-        product_name = np.random.choice(PRODUCT_NAMES[category])
-        
-        # --- Sales and Operations Metrics ---
-        customer_segment = np.random.choice(CUSTOMER_SEGMENTS, p=[0.4, 0.1, 0.5])
-        campaign_name = np.random.choice(CAMPAIGN_NAMES)
-        units_sold = np.random.randint(10, 300)
-        
-        # --- Base price logic by category ---
-        if category == 'Electronics':
-            base_price = np.random.uniform(150, 800)
-        elif category == 'Software':
-            base_price = np.random.uniform(500, 2500)
-        elif category == 'Services':
-            base_price = np.random.uniform(100, 600)
-        else: # Apparel
-            base_price = np.random.uniform(20, 150)
-            
+# Eagerly compiled for the generator's array types and cached in __pycache__, so repeat runs skip the JIT
+@njit('void(int16[:], float64[:], uint8[:], uint8[:], uint8[:], float64[:], '
+      'float64[:], float64[:], float64[:], float64[:], float64[:])',
+      parallel=True, fastmath=True, cache=True)
+def compute_financials(units, base, region, cat, camp, cost_ratio,
+                       out_rev, out_cost, out_profit, out_margin, out_aov):
+    for i in prange(units.shape[0]):
         # --- Revenue influenced by region and campaign (Simulated Bias/Performance) ---
-        revenue = units_sold * base_price
-        
-        # North region bias for Electronics
-        if region == 'North' and category == 'Electronics':
-            revenue *= 1.15
-        
-        # South region bias for Apparel
-        if region == 'South' and category == 'Apparel':
-            revenue *= 1.2
-            
-        # Campaign performance bias
-        if 'Holiday' in campaign_name:
-            revenue *= 1.25
-        if 'Summer' in campaign_name:
-            revenue *= 1.1
-            
+        # revenue / units is just the biased unit price, so the average order value needs no division
+        aov = base[i] * REGION_CATEGORY_MULT[region[i], cat[i]] * CAMPAIGN_MULT[camp[i]]
+        rev = units[i] * aov
+
         # --- Cost and profit logic ---
-        cost = revenue * np.random.uniform(0.5, 0.75)
-        profit = revenue - cost
-        profit_margin = round((profit / revenue) * 100, 2)
-        
-        # --- Inventory and returns (Physical Goods only) ---
-        if category in ['Electronics', 'Apparel']:
-            inventory_level = np.random.randint(100, 5000)
-            return_rate = np.random.uniform(0.01, 0.1)
-        else:
-            inventory_level = np.nan # Use NaN for non-physical goods
-            return_rate = 0.0
-            
-        # --- Customer and satisfaction ---
-        order_id = f"ORD-{random.randint(100000,999999)}"
-        customer_id = f"CUST-{np.random.randint(10000, 99999)}"
-        conversion_rate = np.random.uniform(0.02, 0.15)
-        satisfaction_score = np.random.choice([1, 2, 3, 4, 5], p=[0.05, 0.1, 0.2, 0.4, 0.25])
-        
-        # --- Time attributes (Derived) ---
-        month = transaction_date.strftime('%Y-%m')
-        quarter = f"{transaction_date.year}-Q{(transaction_date.month - 1)//3 + 1}"
-        year = transaction_date.year
-        week_number = transaction_date.isocalendar()[1]
-        
-        # --- Derived metrics ---
-        avg_order_value = revenue / units_sold
-
-        # Build the record list
-        record = [
-            transaction_date.strftime('%Y-%m-%d'), 
-            region, 
-            product_name, 
-            category, 
-            round(revenue, 2), 
-            round(cost, 2), 
-            round(profit, 2), 
-            profit_margin, 
-            units_sold, 
-            inventory_level, 
-            round(return_rate, 3), 
-            order_id,
-            customer_id, 
-            customer_segment, 
-            campaign_name, 
-            round(conversion_rate, 3), 
-            satisfaction_score, 
-            round(avg_order_value, 2), 
-            month, 
-            quarter, 
-            year, 
-            week_number
-        ]
-        records.append(record)
-        
-    return records
+        # profit / revenue == 1 - cost_ratio, so the margin needs no division either
+        cost = rev * cost_ratio[i]
+        profit = rev - cost
+
+        out_rev[i] = rev
+        out_cost[i] = cost
+        out_profit[i] = profit
+        out_margin[i] = (1.0 - cost_ratio[i]) * 100.0
+        out_aov[i] = aov
 
 # -----------------------------
-# GENERATE AND SAVE DATA
+# DATA GENERATION FUNCTION
 # -----------------------------
-print(f"Generating {NUM_ROWS} rows of enhanced business performance data...")
-data = generate_business_data(NUM_ROWS)
+def generate_business_data(num_records):
+    # --- General Business Attributes ---
+    # Random dates within the last 18 months (day resolution)
+    dates = np.datetime64(START_DATE.date(), 'D') + rng.integers(0, 541, num_records)
+    region_codes = rng.choice(len(REGIONS), num_records, p=[0.25, 0.25, 0.25, 0.25]).astype(np.uint8)
+    category_codes = rng.choice(len(PRODUCT_CATEGORIES), num_records, p=[0.3, 0.2, 0.3, 0.2]).astype(np.uint8)
+    product_codes = PRODUCT_OFFSETS[category_codes] + rng.integers(0, PRODUCT_COUNTS[category_codes])
+
+    # --- Sales and Operations Metrics ---
+    segment_codes = rng.choice(len(CUSTOMER_SEGMENTS), num_records, p=[0.4, 0.1, 0.5]).astype(np.uint8)
+    campaign_codes = rng.integers(0, len(CAMPAIGN_NAMES), num_records, dtype=np.uint8)
+    units_sold = rng.integers(10, 300, num_records, dtype=np.int16)
+
+    # --- Base price logic by category ---
+    low = BASE_PRICE_LOW[category_codes]
+    base_price = low + rng.random(num_records) * (BASE_PRICE_HIGH[category_codes] - low)
+
+    # --- Revenue, cost and profit (biases applied in the compiled kernel) ---
+    # Cost ratio and conversion rate come from one fused uniform draw, one contiguous row each
+    cost_ratio, conversion_rate = rng.random((2, num_records))
+    cost_ratio = 0.5 + cost_ratio * 0.25  # uniform in [0.5, 0.75)
+    conversion_rate = 0.02 + conversion_rate * 0.13  # uniform in [0.02, 0.15)
+    # One preallocated block; the kernel writes straight into its contiguous rows
+    financials = np.empty((5, num_records), dtype=np.float64)
+    revenue, cost, profit, profit_margin, avg_order_value = financials
+    compute_financials(units_sold, base_price, region_codes, category_codes, campaign_codes, cost_ratio,
+                       revenue, cost, profit, profit_margin, avg_order_value)
 
-columns = [
+    # --- Inventory and returns (Physical Goods only) ---
+    is_physical = np.isin(category_codes, PHYSICAL_CATEGORY_CODES)
+    num_physical = is_physical.sum()
+    inventory_level = np.zeros(num_records, dtype=np.int32)
+    inventory_level[is_physical] = rng.integers(100, 5000, num_physical, dtype=np.int32)
+    inventory_level = pd.arrays.IntegerArray(inventory_level, ~is_physical)  # NA for non-physical goods
+    return_rate = np.zeros(num_records, dtype=np.float64)
+    return_rate[is_physical] = rng.uniform(0.01, 0.1, num_physical)
+
+    # --- Customer and satisfaction ---
+    order_ids = np.char.add('ORD-', rng.integers(100000, 1000000, num_records).astype('U6'))
+    customer_ids = np.char.add('CUST-', rng.integers(10000, 99999, num_records).astype('U5'))
+    satisfaction_score = rng.choice(np.arange(1, 6, dtype=np.int8), num_records, p=[0.05, 0.1, 0.2, 0.4, 0.25])
+
+    # --- Time attributes (Derived column-wise through datetime64 unit casts) ---
+    months = dates.astype('datetime64[M]')
+    years = months.astype('datetime64[Y]').astype(np.int16) + np.int16(1970)
+    quarters = months.astype(np.int32) % 12 // 3 + 1
+    week_numbers = pd.DatetimeIndex(dates).isocalendar().week.to_numpy(dtype=np.int8)
+
+    # Build the columns as compact typed arrays (ratios and per-order values fit float32; revenue,
+    # cost and profit reach ~1M and stay float64 to keep cent precision); low-cardinality labels are categoricals over their codes
+    return {
+        'Date': dates.astype(str),
+        'Region': pd.Categorical.from_codes(region_codes, REGIONS),
+        'Product_Service_Name': pd.Categorical.from_codes(product_codes, ALL_PRODUCT_NAMES),
+        'Category_Department': pd.Categorical.from_codes(category_codes, PRODUCT_CATEGORIES),
+        'Revenue': revenue,
+        'Cost': cost,
+        'Profit': profit,
+        'Profit_Margin_pct': profit_margin.astype(np.float32),
+        'Units_Sold': units_sold,
+        'Inventory_Level': inventory_level,
+        'Return_Rate_pct': return_rate.astype(np.float32),
+        'Order_ID': order_ids,
+        'Customer_ID': customer_ids,
+        'Customer_Segment': pd.Categorical.from_codes(segment_codes, CUSTOMER_SEGMENTS),
+        'Campaign_Name': pd.Categorical.from_codes(campaign_codes, CAMPAIGN_NAMES),
+        'Conversion_Rate_pct': conversion_rate.astype(np.float32),
+        'Customer_Satisfaction_Score': satisfaction_score,
+        'Average_Order_Value': avg_order_value.astype(np.float32),
+        'Month': months.astype(str),
+        'Quarter': np.char.add(np.char.add(years.astype(str), '-Q'), quarters.astype(str)),
+        'Year': years,
+        'Week_Number': week_numbers
+    }
+
+# -----------------------------
+# GENERATE AND SAVE DATA
+# -----------------------------
+COLUMNS = [
     'Date', 'Region', 'Product_Service_Name', 'Category_Department', 
     'Revenue', 'Cost', 'Profit', 'Profit_Margin_pct', 
     'Units_Sold', 'Inventory_Level', 'Return_Rate_pct', 'Order_ID', 
@@ -145,17 +166,40 @@ columns = [
     'Month', 'Quarter', 'Year', 'Week_Number'
 ]
 
-df = pd.DataFrame(data, columns=columns)
+def main(num_rows=NUM_ROWS, out=FILE_NAME):
+    parquet_file_name = os.path.splitext(out)[0] + '.parquet'
+
+    print(f"Generating {num_rows} rows of enhanced business performance data...")
+    data = generate_business_data(num_rows)
+
+    df = pd.DataFrame(data, columns=COLUMNS)
+
+    # Columns are built with their final numeric types (important for analysis/chatbots)
+    assert df.dtypes['Inventory_Level'].kind in 'iuf'
+    assert df.dtypes['Customer_Satisfaction_Score'].kind in 'iuf'
+
+    # Save to CSV (the format the chatbot uploads), rounding and encoding a bounded number of rows
+    # at a time so no full-size rounded copy of the frame is built
+    for start in range(0, max(len(df), 1), CSV_CHUNK_SIZE):
+        chunk = df.iloc[start:start + CSV_CHUNK_SIZE].round(CSV_DECIMALS)
+        chunk.to_csv(out, index=False, mode='w' if start == 0 else 'a', header=start == 0)
+
+    # Save a typed, columnar copy; the categorical labels are stored dictionary-encoded
+    df.to_parquet(parquet_file_name, engine='pyarrow', compression='snappy', index=False)
+
+    print(f"\n✅ Data generation complete.")
+    print(f"Files saved as: {out}, {parquet_file_name}")
+    print(f"First transaction date: {df['Date'].min()}")
+    print(f"Last transaction date: {df['Date'].max()}")
+    print(f"Total records: {len(df)}")
+    return df
 
-# Clean data types (important for analysis/chatbots)
-df['Inventory_Level'] = pd.to_numeric(df['Inventory_Level'], errors='coerce')
-df['Customer_Satisfaction_Score'] = pd.to_numeric(df['Customer_Satisfaction_Score'], errors='coerce')
 
-# Save to CSV
-df.to_csv(FILE_NAME, index=False)
+if __name__ == '__main__':
+    import argparse
 
-print(f"\n✅ Data generation complete.")
-print(f"File saved as: {FILE_NAME}")
-print(f"First transaction date: {df['Date'].min()}")
-print(f"Last transaction date: {df['Date'].max()}")
-print(f"Total records: {len(df)}")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate synthetic business performance data.")
+    parser.add_argument('--rows', type=int, default=NUM_ROWS, help="number of rows to generate")
+    parser.add_argument('--out', default=FILE_NAME, help="CSV output path (a .parquet copy is written alongside)")
+    args = parser.parse_args()
+    main(args.rows, args.out)
@@ -0,0 +1,21 @@
+import numpy as np
+from numba import njit
+
+# Serial on purpose: Streamlit calls this from a different thread per session, which numba's
+# default workqueue threading layer does not support for parallel=True kernels
+@njit(cache=True)
+def group_sums(codes, values, ngroups):
+    # Per-group sums of each row of values (NaN skipped), with the group's row count as the last column;
+    # codes of -1 (missing key) are dropped
+    ncols, n = values.shape
+    sums = np.zeros((ngroups, ncols + 1))
+    for i in range(n):
+        code = codes[i]
+        if code < 0:
+            continue
+        sums[code, ncols] += 1
+        for j in range(ncols):
+            value = values[j, i]
+            if not np.isnan(value):
+                sums[code, j] += value
+    return sums
@@ -1,11 +1,16 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import hashlib
+import importlib.util
+import io
 import re
 
+from group_sums import group_sums
+
 st.set_page_config(
     page_title="Data Analyst Chatbot",
     page_icon="🤖",
@@ -57,63 +62,193 @@ st.markdown("""
         margin: 1rem 0;
     }
 </style>
+
+<div class="main-header">
+    <h1>🤖 Data Analyst Chatbot</h1>
+    <p>Upload your CSV and ask me anything about your business performance data!</p>
+</div>
 """, unsafe_allow_html=True)
 
 if 'messages' not in st.session_state:
     st.session_state.messages = []
 if 'data' not in st.session_state:
     st.session_state.data = None
+    st.session_state.data_version = None
+if 'artifacts' not in st.session_state:
+    # Charts/dataframes of recent assistant messages, keyed by message index; messages only hold text
+    st.session_state.artifacts = OrderedDict()
 
-st.markdown("""
-<div class="main-header">
-    <h1>🤖 Data Analyst Chatbot</h1>
-    <p>Upload your CSV and ask me anything about your business performance data!</p>
-</div>
-""", unsafe_allow_html=True)
+MAX_ARTIFACTS = 20
 
-@st.cache_data
-def analyze_question(question, df):
-    question_lower = question.lower()
-    
-    if any(word in question_lower for word in ['region', 'regional', 'geography', 'location']):
-        return analyze_regional_performance(df)
-    
-    elif any(word in question_lower for word in ['monthly', 'trend', 'time', 'month', 'over time']):
-        return analyze_monthly_trends(df)
-    
-    elif any(word in question_lower for word in ['profit', 'margin', 'profitability', 'cost']):
-        return analyze_profit_margins(df)
-    
-    elif any(word in question_lower for word in ['campaign', 'marketing', 'promotion', 'channel']):
-        return analyze_campaign_performance(df)
-    
-    elif any(word in question_lower for word in ['satisfaction', 'customer', 'rating', 'score']):
-        return analyze_customer_satisfaction(df)
+# st.cache_data is shared by every session of the server process, so entries are bounded per
+# function and expire an hour after they are computed; a session still using its data recomputes
+LOADED_CSV_MAX_ENTRIES = 8
+ANALYSIS_CACHE_MAX_ENTRIES = 64
+CACHE_TTL = "1h"
+
+
+# Newest charts that stay interactive; older ones show a static snapshot so reruns don't resend every figure
+INTERACTIVE_CHARTS = 3
+
+
+@st.cache_resource
+def _snapshot_renderer():
+    # One background worker per server process, so Kaleido's headless-browser render never runs on
+    # the script thread; disabled when Kaleido is missing or fails to render (e.g. no Chrome)
+    return {"executor": ThreadPoolExecutor(max_workers=1), "enabled": importlib.util.find_spec('kaleido') is not None}
+
+def _render_snapshot(renderer, chart):
+    try:
+        return chart.to_image(format='webp')
+    except Exception:
+        renderer["enabled"] = False
+        raise
+
+def chart_snapshot(artifact, rank):
+    # rank 0 is the newest chart. The oldest chart still in the interactive window starts its snapshot in
+    # the background; charts past the window use it once it is ready and stay interactive until then
+    renderer = _snapshot_renderer()
+    if artifact["snapshot"] is None and rank >= INTERACTIVE_CHARTS - 1 and renderer["enabled"]:
+        artifact["snapshot"] = renderer["executor"].submit(_render_snapshot, renderer, artifact["chart"])
+    
+    snapshot = artifact["snapshot"]
+    if rank < INTERACTIVE_CHARTS or snapshot is None or not snapshot.done() or snapshot.exception() is not None:
+        return None
+    return snapshot.result()
+
+@st.cache_data(show_spinner=False, max_entries=LOADED_CSV_MAX_ENTRIES, ttl=CACHE_TTL)
+def load_csv(buf):
+    header = pd.read_csv(io.BytesIO(buf), nrows=0).columns
+    try:
+        df = pd.read_csv(io.BytesIO(buf), engine='pyarrow', parse_dates=['Date'] if 'Date' in header else None)
+    except Exception:
+        # pyarrow rejects structurally odd files (ragged rows, duplicated headers) outright
+        df = None
+    if df is None or df.columns.has_duplicates:
+        # The default engine pads short rows with NaN and renames duplicates ('Date.1'); the
+        # to_datetime/to_numeric coercions below then clean up whatever it loaded
+        df = pd.read_csv(io.BytesIO(buf))
+    elif 'Date' in df.columns and isinstance(df['Date'].dtype, pd.DatetimeTZDtype):
+        # pyarrow converts offset timestamps to UTC; re-read them as text so to_datetime keeps the
+        # uploaded local wall time, as the default engine does
+        df['Date'] = pd.read_csv(io.BytesIO(buf), usecols=['Date'], dtype={'Date': str})['Date']
+    
+    if 'Date' in df.columns:
+        if not pd.api.types.is_datetime64_any_dtype(df['Date']):
+            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    
+    # Counts and scores are downcast to the smallest integer dtype that holds them; money and
+    # inventory columns stay float64 because float32 sums drift by whole units on large uploads
+    numeric_columns = {
+        'Revenue': None, 'Cost': None, 'Profit': None, 'Inventory_Level': None,
+        'Units_Sold': 'integer', 'Customer_Satisfaction_Score': 'integer'
+    }
+    for col, downcast in numeric_columns.items():
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce', downcast=downcast)
     
-    elif any(word in question_lower for word in ['inventory', 'stock', 'warehouse', 'levels']):
-        return analyze_inventory(df)
+    # Low-cardinality grouping keys: groupby works on the integer codes instead of hashing strings
+    for col in ('Region', 'Campaign_Name', 'Category_Department', 'Product_Service_Name'):
+        if col in df.columns:
+            df[col] = df[col].astype('category')
     
-    elif any(word in question_lower for word in ['category', 'product', 'department', 'service']):
-        return analyze_category_performance(df)
+    return df
+
+# Analyses are cached per uploaded dataset: data_version identifies the frame, so the
+# DataFrame argument itself is never content-hashed on a lookup
+cache_by_data_version = st.cache_data(
+    hash_funcs={pd.DataFrame: lambda df: None},
+    max_entries=ANALYSIS_CACHE_MAX_ENTRIES,
+    ttl=CACHE_TTL
+)
+
+def _ratio(numerator, denominator, scale=1):
+    # numerator / denominator * scale rounded to 2 places in one NumPy pass; 0 where the denominator is 0
+    numerator = numerator.to_numpy(dtype=np.float64)
+    denominator = denominator.to_numpy(dtype=np.float64)
+    ratio = np.zeros_like(numerator)
+    np.divide(numerator, denominator, out=ratio, where=denominator != 0)
+    return np.round(ratio * scale, 2)
+
+@cache_by_data_version
+def _group_sums(df, data_version, key):
+    # Every caller re-sorts the result itself, so group order is not preserved
+    cols = [col for col in ('Revenue', 'Profit', 'Units_Sold') if col in df.columns]
+    if not isinstance(df[key].dtype, pd.CategoricalDtype):
+        aggs = {col: (col, 'sum') for col in cols}
+        return df.groupby(key, observed=True, sort=False).agg(**aggs, Records=('Revenue', 'size'))
+    
+    codes = df[key].cat.codes.to_numpy()
+    values = np.vstack([df[col].to_numpy(dtype=np.float64, na_value=np.nan) for col in cols])
+    sums = group_sums(codes, values, len(df[key].cat.categories))
+    
+    observed = np.flatnonzero(sums[:, -1])
+    index = pd.CategoricalIndex(pd.Categorical.from_codes(observed, dtype=df[key].dtype), name=key)
+    result = pd.DataFrame(sums[observed, :-1], index=index, columns=cols)
+    for col in cols:
+        if pd.api.types.is_integer_dtype(df[col].dtype):
+            result[col] = result[col].astype('int64')
+    result['Records'] = sums[observed, -1].astype('int64')
+    return result
+
+@cache_by_data_version
+def _month_keys(df, data_version):
+    # Month bucket of every row for trend grouping, kept beside the uploaded frame rather than in it.
+    # Offset-aware dates are bucketed on their local wall time, not after conversion to UTC
+    dates = df['Date']
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    return dates.to_numpy().astype('datetime64[M]')
+
+# Grouping keys the analyzers share through _group_sums
+GROUP_SUM_KEYS = ('Region', 'Campaign_Name', 'Category_Department', 'Product_Service_Name')
+
+def prewarm_analysis_cache(df, data_version):
+    # Fill the shared month-key and _group_sums caches at upload so first questions are cache hits
+    if 'Date' in df.columns:
+        _month_keys(df, data_version)
+    if 'Revenue' not in df.columns:
+        return
+    for key in GROUP_SUM_KEYS:
+        if key in df.columns:
+            _group_sums(df, data_version, key)
+
+# Question topics in priority order: the first topic with any keyword in the question wins
+QUESTION_TOPICS = {
+    'region': ['region', 'regional', 'geography', 'location'],
+    'trend': ['monthly', 'trend', 'time', 'month', 'over time'],
+    'profit': ['profit', 'margin', 'profitability', 'cost'],
+    'campaign': ['campaign', 'marketing', 'promotion', 'channel'],
+    'satisfaction': ['satisfaction', 'customer', 'rating', 'score'],
+    'inventory': ['inventory', 'stock', 'warehouse', 'levels'],
+    'category': ['category', 'product', 'department', 'service'],
+    'summary': ['summary', 'overview', 'general', 'what is the data showing'],
+}
+TOPIC_PRIORITY = {topic: i for i, topic in enumerate(QUESTION_TOPICS)}
+
+# One alternation of named groups inside a lookahead, so a single scan reports every
+# (possibly overlapping) keyword position with the highest-priority topic starting there
+TOPIC_PATTERN = re.compile('(?=' + '|'.join(
+    f"(?P<{topic}>{'|'.join(re.escape(word) for word in words)})" for topic, words in QUESTION_TOPICS.items()
+) + ')')
+
+def analyze_question(question, df, data_version):
+    topics = {match.lastgroup for match in TOPIC_PATTERN.finditer(question.lower())}
     
-    elif any(word in question_lower for word in ['summary', 'overview', 'general', 'what is the data showing']):
-        return generate_summary(df)
+    if topics:
+        return TOPIC_HANDLERS[min(topics, key=TOPIC_PRIORITY.get)](df, data_version)
     
-    else:
-        return {"text": "I can help you analyze various aspects of your business data. Try asking about **regional performance**, **monthly trends**, **profit margins**, **campaign effectiveness**, **customer satisfaction**, or **inventory levels**."}
+    return {"text": "I can help you analyze various aspects of your business data. Try asking about **regional performance**, **monthly trends**, **profit margins**, **campaign effectiveness**, **customer satisfaction**, or **inventory levels**."}
 
-@st.cache_data
-def analyze_regional_performance(df):
+@cache_by_data_version
+def analyze_regional_performance(df, data_version):
+    import plotly.express as px
     if 'Region' not in df.columns or 'Revenue' not in df.columns:
         return {"text": "Regional analysis requires 'Region' and 'Revenue' columns in your data."}
     
-    regional_data = df.groupby('Region').agg({
-        'Revenue': 'sum',
-        'Profit': 'sum',
-        'Units_Sold': 'sum'
-    }).round(2)
+    regional_data = _group_sums(df, data_version, 'Region')[['Revenue', 'Profit', 'Units_Sold']].round(2)
     
-    regional_data['Profit_Margin'] = (regional_data['Profit'] / regional_data['Revenue'] * 100).round(2).fillna(0)
+    regional_data['Profit_Margin'] = _ratio(regional_data['Profit'], regional_data['Revenue'], 100)
     regional_data = regional_data.sort_values('Revenue', ascending=False)
     
     fig = px.bar(
@@ -143,10 +278,10 @@ def analyze_regional_performance(df):
     **Detailed Breakdown:**
     """
     
-    for region in regional_data.index:
-        revenue = regional_data.loc[region, 'Revenue']
-        margin = regional_data.loc[region, 'Profit_Margin']
-        text += f"\n- **{region}:** ${revenue:,.0f} revenue, {margin}% profit margin"
+    text += "".join(
+        f"\n- **{region}:** ${revenue:,.0f} revenue, {margin}% profit margin"
+        for region, revenue, margin in zip(regional_data.index, regional_data['Revenue'].to_numpy(), regional_data['Profit_Margin'].to_numpy())
+    )
     
     return {
         "text": text,
@@ -154,26 +289,24 @@ def analyze_regional_performance(df):
         "dataframe": regional_data
     }
 
-@st.cache_data
-def analyze_monthly_trends(df):
+@cache_by_data_version
+def analyze_monthly_trends(df, data_version):
+    import plotly.graph_objects as go
     if 'Date' not in df.columns or 'Revenue' not in df.columns:
         return {"text": "Monthly trend analysis requires 'Date' (datetime format) and 'Revenue' columns in your data."}
     
-    df_temp = df.copy()
-    df_temp['Month'] = df_temp['Date'].dt.to_period('M')
-    
-    monthly_data = df_temp.groupby('Month').agg({
+    monthly_data = df.groupby(_month_keys(df, data_version)).agg({
         'Revenue': 'sum',
         'Units_Sold': 'sum',
         'Profit': 'sum'
     }).round(2)
     
-    monthly_data.index = monthly_data.index.astype(str)
+    monthly_data.index = monthly_data.index.strftime('%Y-%m').rename('Month')
     
     monthly_data['Revenue_Growth'] = monthly_data['Revenue'].pct_change() * 100
     
     fig = go.Figure()
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=monthly_data.index,
         y=monthly_data['Revenue'],
         mode='lines+markers',
@@ -214,8 +347,9 @@ def analyze_monthly_trends(df):
         "dataframe": monthly_data
     }
 
-@st.cache_data
-def analyze_profit_margins(df):
+@cache_by_data_version
+def analyze_profit_margins(df, data_version):
+    import plotly.express as px
     if 'Profit' not in df.columns or 'Revenue' not in df.columns:
         return {"text": "Profit analysis requires 'Profit' and 'Revenue' columns in your data."}
     
@@ -224,13 +358,9 @@ def analyze_profit_margins(df):
     if group_col not in df.columns:
         return {"text": "Profit analysis requires a 'Product_Service_Name' or 'Category_Department' column in your data."}
     
-    profit_data = df.groupby(group_col).agg({
-        'Revenue': 'sum',
-        'Profit': 'sum',
-        'Units_Sold': 'sum'
-    }).round(2)
+    profit_data = _group_sums(df, data_version, group_col)[['Revenue', 'Profit', 'Units_Sold']].round(2)
     
-    profit_data['Profit_Margin'] = (profit_data['Profit'] / profit_data['Revenue'] * 100).round(2).fillna(0)
+    profit_data['Profit_Margin'] = _ratio(profit_data['Profit'], profit_data['Revenue'], 100)
     profit_data = profit_data.sort_values('Profit_Margin', ascending=False)
     
     df_chart = profit_data.head(10).reset_index()
@@ -260,10 +390,11 @@ def analyze_profit_margins(df):
     **Top 5 Performers:**
     """
     
-    for i, item in enumerate(profit_data.index[:5]):
-        margin = profit_data.loc[item, 'Profit_Margin']
-        revenue = profit_data.loc[item, 'Revenue']
-        text += f"\n{i+1}. **{item}:** {margin}% margin (${revenue:,.0f} revenue)"
+    top_five = profit_data.head(5)
+    text += "".join(
+        f"\n{i+1}. **{item}:** {margin}% margin (${revenue:,.0f} revenue)"
+        for i, (item, margin, revenue) in enumerate(zip(top_five.index, top_five['Profit_Margin'].to_numpy(), top_five['Revenue'].to_numpy()))
+    )
     
     return {
         "text": text,
@@ -271,18 +402,16 @@ def analyze_profit_margins(df):
         "dataframe": profit_data.head(10)
     }
 
-@st.cache_data
-def analyze_campaign_performance(df):
+@cache_by_data_version
+def analyze_campaign_performance(df, data_version):
+    import plotly.express as px
     if 'Campaign_Name' not in df.columns or 'Revenue' not in df.columns:
         return {"text": "Campaign analysis requires 'Campaign_Name' and 'Revenue' columns in your data."}
     
-    campaign_data = df.groupby('Campaign_Name').agg({
-        'Revenue': 'sum',
-        'Units_Sold': 'sum',
-        'Profit': 'sum'
-    }).round(2)
+    campaign_sums = _group_sums(df, data_version, 'Campaign_Name')
+    campaign_data = campaign_sums[['Revenue', 'Units_Sold', 'Profit']].round(2)
     
-    campaign_data['Avg_Order_Value'] = (campaign_data['Revenue'] / df.groupby('Campaign_Name').size()).round(2).fillna(0)
+    campaign_data['Avg_Order_Value'] = _ratio(campaign_data['Revenue'], campaign_sums['Records'])
     campaign_data = campaign_data.sort_values('Revenue', ascending=False)
     
     fig = px.pie(
@@ -308,10 +437,10 @@ def analyze_campaign_performance(df):
     **Campaign Breakdown:**
     """
     
-    for campaign in campaign_data.index:
-        revenue = campaign_data.loc[campaign, 'Revenue']
-        aov = campaign_data.loc[campaign, 'Avg_Order_Value']
-        text += f"\n- **{campaign}:** ${revenue:,.0f} revenue, **${aov:.0f}** avg order value"
+    text += "".join(
+        f"\n- **{campaign}:** ${revenue:,.0f} revenue, **${aov:.0f}** avg order value"
+        for campaign, revenue, aov in zip(campaign_data.index, campaign_data['Revenue'].to_numpy(), campaign_data['Avg_Order_Value'].to_numpy())
+    )
     
     return {
         "text": text,
@@ -319,16 +448,31 @@ def analyze_campaign_performance(df):
         "dataframe": campaign_data
     }
 
-@st.cache_data
-def analyze_customer_satisfaction(df):
+@cache_by_data_version
+def analyze_customer_satisfaction(df, data_version):
+    import plotly.express as px
     if 'Customer_Satisfaction_Score' not in df.columns:
         return {"text": "Customer satisfaction analysis requires a 'Customer_Satisfaction_Score' column (0-5 scale) in your data."}
     
-    avg_satisfaction = df['Customer_Satisfaction_Score'].mean()
-    satisfaction_counts = df['Customer_Satisfaction_Score'].value_counts().sort_index()
+    scores = df['Customer_Satisfaction_Score'].to_numpy(dtype=np.float64)
+    answered = ~np.isnan(scores)
+    avg_satisfaction = scores[answered].mean() if answered.any() else np.nan
     
     if 'Region' in df.columns:
-        region_satisfaction = df.groupby('Region')['Customer_Satisfaction_Score'].mean().round(2)
+        # Per-region mean as two bincounts over the categorical codes (code -1 marks a missing region)
+        regions = df['Region'].astype('category')
+        codes = regions.cat.codes.to_numpy()
+        keep = answered & (codes >= 0)
+        score_sums = np.bincount(codes[keep], weights=scores[keep], minlength=len(regions.cat.categories))
+        score_counts = np.bincount(codes[keep], minlength=len(regions.cat.categories))
+        region_means = np.full(len(score_sums), np.nan)
+        np.divide(score_sums, score_counts, out=region_means, where=score_counts > 0)
+        observed = np.bincount(codes[codes >= 0], minlength=len(regions.cat.categories)) > 0
+        region_satisfaction = pd.Series(
+            region_means[observed],
+            index=pd.Index(regions.cat.categories[observed], name='Region'),
+            name='Customer_Satisfaction_Score'
+        ).round(2)
         region_satisfaction = region_satisfaction.sort_values(ascending=False)
         
         fig = px.bar(
@@ -352,10 +496,10 @@ def analyze_customer_satisfaction(df):
         **By Region:**
         """
         
-        for region in region_satisfaction.index:
-            score = region_satisfaction[region]
-            emoji = "🟢" if score >= 4 else "🟡" if score >= 3 else "🔴"
-            text += f"\n{emoji} **{region}:** {score}/5.0"
+        text += "".join(
+            f"\n{'🟢' if score >= 4 else '🟡' if score >= 3 else '🔴'} **{region}:** {score}/5.0"
+            for region, score in zip(region_satisfaction.index, region_satisfaction.to_numpy())
+        )
         
         return {
             "text": text,
@@ -364,6 +508,15 @@ def analyze_customer_satisfaction(df):
         }
     
     else:
+        answered_scores = scores[answered]
+        if np.all((answered_scores >= 0) & (answered_scores <= 100) & (answered_scores % 1 == 0)):
+            # Whole-number scores: count them with one bincount pass instead of hashing and sorting
+            score_counts = np.bincount(answered_scores.astype(np.int64))
+            present = np.flatnonzero(score_counts)
+            satisfaction_counts = pd.Series(score_counts[present], index=present, name='count')
+        else:
+            satisfaction_counts = df['Customer_Satisfaction_Score'].value_counts().sort_index()
+        
         df_chart = satisfaction_counts.reset_index()
         df_chart.columns = ['Score', 'Count']
         fig = px.bar(
@@ -386,31 +539,37 @@ def analyze_customer_satisfaction(df):
         **Score Distribution:**
         """
         
-        for score in satisfaction_counts.index:
-            count = satisfaction_counts[score]
-            percentage = (count / len(df) * 100).round(1)
-            text += f"\n- **{int(score)} stars:** {count:,} responses ({percentage}%)"
+        counts = satisfaction_counts.to_numpy()
+        percentages = (counts / len(df) * 100).round(1)
+        text += "".join(
+            f"\n- **{int(score)} stars:** {count:,} responses ({percentage}%)"
+            for score, count, percentage in zip(satisfaction_counts.index, counts, percentages)
+        )
         
         return {
             "text": text,
             "chart": fig
         }
 
-@st.cache_data
-def analyze_inventory(df):
+@cache_by_data_version
+def analyze_inventory(df, data_version):
+    import plotly.express as px
     if 'Inventory_Level' not in df.columns or 'Category_Department' not in df.columns:
         return {"text": "Inventory analysis requires 'Inventory_Level' and 'Category_Department' columns in your data."}
     
-    inventory_df = df[df['Inventory_Level'].notna()].copy()
+    inventory_levels = df['Inventory_Level'].to_numpy(dtype=np.float64, na_value=np.nan)
+    stocked = ~np.isnan(inventory_levels)
+    stocked_count = int(np.count_nonzero(stocked))
     
-    if len(inventory_df) == 0:
+    if stocked_count == 0:
         return {"text": "No inventory data available for analysis."}
     
-    inventory_by_category = inventory_df.groupby('Category_Department').agg({
-        'Inventory_Level': ['mean', 'sum', 'count']
-    }).round(0)
-    
-    inventory_by_category.columns = ['Avg_Inventory', 'Total_Inventory', 'Product_Count']
+    inventory_by_category = df.groupby('Category_Department', observed=True).agg(
+        Avg_Inventory=('Inventory_Level', 'mean'),
+        Total_Inventory=('Inventory_Level', 'sum'),
+        Product_Count=('Inventory_Level', 'count')
+    )
+    inventory_by_category = inventory_by_category[inventory_by_category['Product_Count'] > 0].round(0)
     inventory_by_category = inventory_by_category.sort_values('Total_Inventory', ascending=False)
     
     fig = px.bar(
@@ -423,25 +582,30 @@ def analyze_inventory(df):
         color_continuous_scale='Blues'
     )
     
-    low_stock_threshold = inventory_df['Inventory_Level'].quantile(0.25)
-    low_stock_items_count = len(inventory_df[inventory_df['Inventory_Level'] <= low_stock_threshold])
+    inventory_levels = inventory_levels[stocked]
+    low_stock_threshold = np.quantile(inventory_levels, 0.25)
+    low_stock_items_count = int(np.count_nonzero(inventory_levels <= low_stock_threshold))
     
     text = f"""
     ## 📦 Inventory Analysis
     
     **Overall Insights:**
-    - **Total Products with Inventory:** {len(inventory_df):,}
-    - **Average Inventory Level:** **{inventory_df['Inventory_Level'].mean():,.0f}** units
+    - **Total Products with Inventory:** {stocked_count:,}
+    - **Average Inventory Level:** **{inventory_levels.mean():,.0f}** units
     - **Low Stock Risk:** {low_stock_items_count:,} items are below the 25th percentile threshold of **{low_stock_threshold:.0f} units**.
     
     **By Category:**
     """
     
-    for category in inventory_by_category.index:
-        total = inventory_by_category.loc[category, 'Total_Inventory']
-        avg = inventory_by_category.loc[category, 'Avg_Inventory']
-        count = inventory_by_category.loc[category, 'Product_Count']
-        text += f"\n- **{category}:** {total:,.0f} total units, {avg:,.0f} avg per product ({count} products)"
+    text += "".join(
+        f"\n- **{category}:** {total:,.0f} total units, {avg:,.0f} avg per product ({count} products)"
+        for category, total, avg, count in zip(
+            inventory_by_category.index,
+            inventory_by_category['Total_Inventory'].to_numpy(),
+            inventory_by_category['Avg_Inventory'].to_numpy(),
+            inventory_by_category['Product_Count'].to_numpy()
+        )
+    )
     
     return {
         "text": text,
@@ -449,19 +613,16 @@ def analyze_inventory(df):
         "dataframe": inventory_by_category
     }
 
-@st.cache_data
-def analyze_category_performance(df):
+@cache_by_data_version
+def analyze_category_performance(df, data_version):
+    import plotly.express as px
     if 'Category_Department' not in df.columns or 'Revenue' not in df.columns or 'Profit' not in df.columns:
         return {"text": "Category analysis requires 'Category_Department', 'Revenue', and 'Profit' columns in your data."}
     
-    category_data = df.groupby('Category_Department').agg({
-        'Revenue': 'sum',
-        'Profit': 'sum',
-        'Units_Sold': 'sum'
-    }).round(2)
+    category_data = _group_sums(df, data_version, 'Category_Department')[['Revenue', 'Profit', 'Units_Sold']].round(2)
     
-    category_data['Profit_Margin'] = (category_data['Profit'] / category_data['Revenue'] * 100).round(2).fillna(0)
-    category_data['Avg_Unit_Price'] = (category_data['Revenue'] / category_data['Units_Sold']).round(2).fillna(0)
+    category_data['Profit_Margin'] = _ratio(category_data['Profit'], category_data['Revenue'], 100)
+    category_data['Avg_Unit_Price'] = _ratio(category_data['Revenue'], category_data['Units_Sold'])
     category_data = category_data.sort_values('Revenue', ascending=False)
     
     df_chart = category_data.reset_index()
@@ -475,7 +636,8 @@ def analyze_category_performance(df):
         labels={'Revenue': 'Revenue ($)', 'Profit_Margin': 'Profit Margin (%)'},
         size_max=60,
         color='Profit_Margin',
-        color_continuous_scale=px.colors.sequential.Agsunset
+        color_continuous_scale=px.colors.sequential.Agsunset,
+        render_mode='webgl'
     )
     
     top_revenue_category = category_data.index[0]
@@ -492,11 +654,15 @@ def analyze_category_performance(df):
     **Category Breakdown:**
     """
     
-    for category in category_data.index:
-        revenue = category_data.loc[category, 'Revenue']
-        margin = category_data.loc[category, 'Profit_Margin']
-        units = category_data.loc[category, 'Units_Sold']
-        text += f"\n- **{category}:** ${revenue:,.0f} revenue, {margin:.1f}% margin, {units:,} units sold"
+    text += "".join(
+        f"\n- **{category}:** ${revenue:,.0f} revenue, {margin:.1f}% margin, {units:,} units sold"
+        for category, revenue, margin, units in zip(
+            category_data.index,
+            category_data['Revenue'].to_numpy(),
+            category_data['Profit_Margin'].to_numpy(),
+            category_data['Units_Sold'].to_numpy()
+        )
+    )
     
     return {
         "text": text,
@@ -504,11 +670,12 @@ def analyze_category_performance(df):
         "dataframe": category_data
     }
 
-@st.cache_data
-def generate_summary(df):
-    total_revenue = df['Revenue'].sum() if 'Revenue' in df.columns else 0
-    total_profit = df['Profit'].sum() if 'Profit' in df.columns else 0
-    total_units = df['Units_Sold'].sum() if 'Units_Sold' in df.columns else 0
+@cache_by_data_version
+def generate_summary(df, data_version):
+    totals = df[[col for col in ('Revenue', 'Profit', 'Units_Sold') if col in df.columns]].sum()
+    total_revenue = totals.get('Revenue', 0)
+    total_profit = totals.get('Profit', 0)
+    total_units = totals.get('Units_Sold', 0)
     
     overall_margin = (total_profit / total_revenue * 100) if total_revenue > 0 else 0
     
@@ -517,8 +684,8 @@ def generate_summary(df):
     else:
         date_range = "Date information not available"
     
-    top_region = df.groupby('Region')['Revenue'].sum().idxmax() if 'Region' in df.columns and 'Revenue' in df.columns else "N/A"
-    top_category = df.groupby('Category_Department')['Revenue'].sum().idxmax() if 'Category_Department' in df.columns and 'Revenue' in df.columns else "N/A"
+    top_region = _group_sums(df, data_version, 'Region')['Revenue'].idxmax() if 'Region' in df.columns and 'Revenue' in df.columns else "N/A"
+    top_category = _group_sums(df, data_version, 'Category_Department')['Revenue'].idxmax() if 'Category_Department' in df.columns and 'Revenue' in df.columns else "N/A"
     
     text = f"""
     ## 📊 Business Performance Summary
@@ -527,7 +694,7 @@ def generate_summary(df):
     - **Total Revenue:** **${total_revenue:,.0f}**
     - **Total Profit:** **${total_profit:,.0f}**
     - **Overall Profit Margin:** **{overall_margin:.1f}%**
-    - **Total Units Sold:** {total_units:,}
+    - **Total Units Sold:** {total_units:,.0f}
     - **Total Records:** {len(df):,}
     - **Date Range:** {date_range}
     
@@ -542,6 +709,17 @@ def generate_summary(df):
     
     return {"text": text}
 
+TOPIC_HANDLERS = {
+    'region': analyze_regional_performance,
+    'trend': analyze_monthly_trends,
+    'profit': analyze_profit_margins,
+    'campaign': analyze_campaign_performance,
+    'satisfaction': analyze_customer_satisfaction,
+    'inventory': analyze_inventory,
+    'category': analyze_category_performance,
+    'summary': generate_summary,
+}
+
 
 with st.sidebar:
     st.header("📁 Data Upload")
@@ -549,17 +727,17 @@ with st.sidebar:
     
     if uploaded_file is not None:
         try:
-            df = pd.read_csv(uploaded_file)
-            
-            if 'Date' in df.columns:
-                df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-            
-            numeric_columns = ['Revenue', 'Cost', 'Profit', 'Units_Sold', 'Customer_Satisfaction_Score', 'Inventory_Level']
-            for col in numeric_columns:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
+            if uploaded_file.file_id != st.session_state.get('data_file_id'):
+                buf = uploaded_file.getvalue()
+                st.session_state.data = load_csv(buf)
+                st.session_state.data_file_id = uploaded_file.file_id
+                # Derived from the file contents: the analysis cache is shared by all sessions, and
+                # re-uploading the same data reuses its entries instead of adding new ones
+                st.session_state.data_version = hashlib.blake2b(buf, digest_size=16).hexdigest()
+                prewarm_analysis_cache(st.session_state.data, st.session_state.data_version)
             
-            st.session_state.data = df
+            df = st.session_state.data
+            data_version = st.session_state.data_version
             
             st.success(f"✅ Data loaded successfully! Records: {len(df):,}")
             
@@ -585,58 +763,39 @@ with st.sidebar:
             
             st.subheader("🔍 Quick Insights")
             if 'Revenue' in df.columns and 'Region' in df.columns:
-                top_region = df.groupby('Region')['Revenue'].sum().idxmax()
+                top_region = _group_sums(df, data_version, 'Region')['Revenue'].idxmax()
                 st.caption(f"**Top Region:** {top_region}")
             
             if 'Revenue' in df.columns and 'Category_Department' in df.columns:
-                top_category = df.groupby('Category_Department')['Revenue'].sum().idxmax()
+                top_category = _group_sums(df, data_version, 'Category_Department')['Revenue'].idxmax()
                 st.caption(f"**Top Category:** {top_category}")
             
         except Exception as e:
             st.error(f"Error loading file: {str(e)}")
 
-if st.session_state.data is not None:
+QUICK_QUESTIONS = [
+    (frozenset({'Region', 'Revenue'}), 0, "📍 Regional Performance", "Show me revenue performance by region"),
+    (frozenset({'Date', 'Revenue'}), 0, "📈 Monthly Trends", "Show me monthly revenue trends"),
+    (frozenset({'Profit', 'Revenue'}), 1, "💰 Profit Analysis", "Which products have the highest profit margins?"),
+    (frozenset({'Campaign_Name', 'Revenue'}), 1, "🎯 Campaign Performance", "How do different campaigns perform?"),
+    (frozenset({'Customer_Satisfaction_Score'}), 2, "😊 Customer Satisfaction", "Show customer satisfaction analysis"),
+    (frozenset({'Inventory_Level', 'Category_Department'}), 2, "📦 Inventory Analysis", "Show inventory levels by category")
+]
+
+def quick_questions(df):
     st.header("💡 Quick Questions")
-    col1, col2, col3 = st.columns(3)
-    
-    buttons = [
-        ("📍 Regional Performance", "Show me revenue performance by region"),
-        ("📈 Monthly Trends", "Show me monthly revenue trends"),
-        ("💰 Profit Analysis", "Which products have the highest profit margins?"),
-        ("🎯 Campaign Performance", "How do different campaigns perform?"),
-        ("😊 Customer Satisfaction", "Show customer satisfaction analysis"),
-        ("📦 Inventory Analysis", "Show inventory levels by category")
-    ]
-    
-    if 'Region' in st.session_state.data.columns and 'Revenue' in st.session_state.data.columns:
-        with col1:
-            if st.button(buttons[0][0]):
-                st.session_state.messages.append({"role": "user", "content": buttons[0][1]})
-    
-    if 'Date' in st.session_state.data.columns and 'Revenue' in st.session_state.data.columns:
-        with col1:
-            if st.button(buttons[1][0]):
-                st.session_state.messages.append({"role": "user", "content": buttons[1][1]})
+    columns = st.columns(3)
+    available = frozenset(df.columns)
+    
+    for required, col_idx, label, question in QUICK_QUESTIONS:
+        if required <= available:
+            with columns[col_idx]:
+                if st.button(label):
+                    st.session_state.messages.append({"role": "user", "content": question})
 
-    if 'Profit' in st.session_state.data.columns and 'Revenue' in st.session_state.data.columns:
-        with col2:
-            if st.button(buttons[2][0]):
-                st.session_state.messages.append({"role": "user", "content": buttons[2][1]})
-    
-    if 'Campaign_Name' in st.session_state.data.columns and 'Revenue' in st.session_state.data.columns:
-        with col2:
-            if st.button(buttons[3][0]):
-                st.session_state.messages.append({"role": "user", "content": buttons[3][1]})
-    
-    if 'Customer_Satisfaction_Score' in st.session_state.data.columns:
-        with col3:
-            if st.button(buttons[4][0]):
-                st.session_state.messages.append({"role": "user", "content": buttons[4][1]})
-    
-    if 'Inventory_Level' in st.session_state.data.columns and 'Category_Department' in st.session_state.data.columns:
-        with col3:
-            if st.button(buttons[5][0]):
-                st.session_state.messages.append({"role": "user", "content": buttons[5][1]})
+
+if st.session_state.data is not None:
+    quick_questions(st.session_state.data)
 
 
 if st.session_state.data is not None:
@@ -651,16 +810,25 @@ if st.session_state.messages:
         latest_question = st.session_state.messages[-1]["content"]
         
         with st.spinner("Analyzing data..."):
-            response = analyze_question(latest_question, st.session_state.data)
+            response = analyze_question(latest_question, st.session_state.data, st.session_state.data_version)
         
-        st.session_state.messages.append({"role": "assistant", "content": response["text"], "chart": response.get("chart"), "dataframe": response.get("dataframe")})
+        msg_id = len(st.session_state.messages)
+        st.session_state.messages.append({"role": "assistant", "content": response["text"], "msg_id": msg_id})
         
-        if "chart" in st.session_state.messages[-2]:
-            del st.session_state.messages[-2]["chart"]
-        if "dataframe" in st.session_state.messages[-2]:
-            del st.session_state.messages[-2]["dataframe"]
+        if response.get("chart") is not None or response.get("dataframe") is not None:
+            artifacts = st.session_state.artifacts
+            artifacts[msg_id] = {"chart": response.get("chart"), "dataframe": response.get("dataframe"), "snapshot": None}
+            if len(artifacts) > MAX_ARTIFACTS:
+                artifacts.popitem(last=False)
 
 
+    artifacts = st.session_state.artifacts
+    chart_ids = [
+        message["msg_id"] for message in st.session_state.messages
+        if message.get("msg_id") in artifacts and artifacts[message["msg_id"]]["chart"] is not None
+    ]
+    chart_rank = {msg_id: rank for rank, msg_id in enumerate(reversed(chart_ids))}
+    
     for message in st.session_state.messages:
         if message["role"] == "user":
             with st.chat_message("user"):
@@ -669,11 +837,17 @@ if st.session_state.messages:
             with st.chat_message("assistant"):
                 st.write(message["content"])
                 
-                if "chart" in message and message["chart"] is not None:
-                    st.plotly_chart(message["chart"], use_container_width=True)
+                artifact = st.session_state.artifacts.get(message.get("msg_id"))
+                
+                if artifact is not None and artifact["chart"] is not None:
+                    snapshot = chart_snapshot(artifact, chart_rank[message["msg_id"]])
+                    if snapshot is not None:
+                        st.image(snapshot, use_container_width=True)
+                    else:
+                        st.plotly_chart(artifact["chart"], use_container_width=True)
                 
-                if "dataframe" in message and message["dataframe"] is not None:
-                    st.dataframe(message["dataframe"], use_container_width=True)
+                if artifact is not None and artifact["dataframe"] is not None:
+                    st.dataframe(artifact["dataframe"], use_container_width=True)
 
 
 if st.session_state.data is None: